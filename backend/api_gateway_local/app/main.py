@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Any
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
 
 import httpx
-from fastapi import Depends, FastAPI, HTTPException
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict
 
-from common.auth import require_auth
+from common.auth import JWKSCache, require_auth
 from common.logging import configure_logging
 from common.rate_limit import RateLimitMiddleware
 from common.settings import CommonSettings
@@ -19,12 +26,29 @@ configure_logging("api_gateway_local")
 
 TX_URL = os.environ.get("TRANSACTION_SERVICE_URL", "http://localhost:8002")
 CONV_URL = os.environ.get("CONVERSATION_SERVICE_URL", "http://localhost:8001")
+SUMMARY_CACHE_TTL_SECONDS = float(os.environ.get("SUMMARY_CACHE_TTL_SECONDS", "30"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+  # One pooled client per process so forwarded calls reuse keep-alive connections.
+  app.state.http = httpx.AsyncClient(
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=30.0),
+  )
+  app.state.jwks_cache = JWKSCache(jwks_url=settings.jwks_url, http=app.state.http) if settings.jwks_url else None
+  try:
+    yield
+  finally:
+    await app.state.http.aclose()
 
 
 app = FastAPI(
   title="Local API Gateway (BFF)",
   version="0.1.0",
   description="Local gateway that standardizes endpoint contracts for the frontend. In production this role is done by AWS API Gateway.",
+  lifespan=lifespan,
+  default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -42,26 +66,43 @@ app.add_middleware(
   allow_headers=["*"],
 )
 
+# Transaction lists (limit up to 2000) are large and repetitive JSON. Compress here, at the
+# edge the browser talks to; the internal hops to the services stay uncompressed.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 
 @app.get("/healthz")
 def healthz() -> dict[str, str]:
   return {"status": "ok", "service": "api_gateway_local"}
 
 
-async def _post_json(url: str, payload: dict[str, Any], headers: dict[str, str]) -> Any:
-  async with httpx.AsyncClient(timeout=10.0) as client:
-    r = await client.post(url, json=payload, headers=headers)
-    if r.status_code >= 400:
-      raise HTTPException(status_code=r.status_code, detail=r.text)
-    return r.json()
+def _raise_for_upstream(r: httpx.Response) -> None:
+  if r.status_code >= 400:
+    raise HTTPException(status_code=r.status_code, detail=r.text)
+
+
+def _forward(r: httpx.Response) -> Response:
+  # Upstream bodies are already JSON; hand the bytes to the client instead of decoding
+  # and re-encoding them here.
+  return Response(content=r.content, status_code=r.status_code, media_type="application/json")
+
 
+async def _post_raw(url: str, content: bytes, headers: dict[str, str]) -> Response:
+  # Caller supplies an already-encoded JSON body (and its content-type header).
+  client: httpx.AsyncClient = app.state.http
+  r = await client.post(url, content=content, headers=headers)
+  # The upstream service validates these bodies; relay its 4xx (e.g. the 422 detail list)
+  # as-is rather than re-wrapping the JSON as a string.
+  if r.status_code >= 500:
+    _raise_for_upstream(r)
+  return _forward(r)
 
-async def _get_json(url: str, headers: dict[str, str]) -> Any:
-  async with httpx.AsyncClient(timeout=10.0) as client:
-    r = await client.get(url, headers=headers)
-    if r.status_code >= 400:
-      raise HTTPException(status_code=r.status_code, detail=r.text)
-    return r.json()
+
+async def _get_raw(url: str, headers: dict[str, str], params: dict[str, Any] | None = None) -> bytes:
+  client: httpx.AsyncClient = app.state.http
+  r = await client.get(url, params=params, headers=headers)
+  _raise_for_upstream(r)
+  return r.content
 
 
 # --------------------
@@ -70,23 +111,27 @@ async def _get_json(url: str, headers: dict[str, str]) -> Any:
 
 
 class ChatMessageIn(BaseModel):
+  """
+  Only user_id is read at the gateway. The full contract (conversation_id, message, history,
+  summary, modality) is validated once by the conversation service, which receives the
+  original request body unchanged.
+  """
+
+  model_config = ConfigDict(extra="allow")
+
   user_id: str
-  conversation_id: str
-  message: str
-  history: list[dict] = []
-  summary: str | None = None
-  modality: str = "text"
 
 
 @app.post("/v1/chat/message")
 async def chat_message(
+  request: Request,
   payload: ChatMessageIn,
   claims: dict = Depends(require_auth(settings)),
 ):
-  headers = {}
+  headers = {"content-type": "application/json"}
   # Forward user identity to services for rate-limiting keying if needed.
   headers["x-user-id"] = str(claims.get("sub", payload.user_id))
-  return await _post_json(f"{CONV_URL}/v1/chat/message", payload.model_dump(), headers=headers)
+  return await _post_raw(f"{CONV_URL}/v1/chat/message", await request.body(), headers=headers)
 
 
 class ChatFeedbackIn(BaseModel):
@@ -102,8 +147,9 @@ async def chat_feedback(
   payload: ChatFeedbackIn,
   claims: dict = Depends(require_auth(settings)),
 ):
-  headers = {"x-user-id": str(claims.get("sub", payload.user_id))}
-  return await _post_json(f"{CONV_URL}/v1/chat/feedback", payload.model_dump(), headers=headers)
+  headers = {"content-type": "application/json", "x-user-id": str(claims.get("sub", payload.user_id))}
+  # pydantic-core encodes straight to JSON bytes; no intermediate dict for httpx to re-serialize.
+  return await _post_raw(f"{CONV_URL}/v1/chat/feedback", payload.model_dump_json().encode(), headers=headers)
 
 
 # --------------------
@@ -111,8 +157,51 @@ async def chat_feedback(
 # --------------------
 
 
+@dataclass
+class _SummaryCache:
+  """
+  Short-lived per-(user, window) cache for the TX summary payload.
+  Concurrent misses for the same key share one in-flight upstream call, so a dashboard
+  page loading summary/insights/recommendations together only hits TX once.
+  """
+
+  ttl_seconds: float = 30.0
+  maxsize: int = 10_000
+  _entries: dict[tuple[str, int], tuple[float, Any]] = field(default_factory=dict)
+  _inflight: dict[tuple[str, int], asyncio.Task] = field(default_factory=dict)
+
+  async def get(self, key: tuple[str, int], fetch: Callable[[], Awaitable[Any]]) -> Any:
+    hit = self._entries.get(key)
+    if hit and (time.monotonic() - hit[0]) <= self.ttl_seconds:
+      return hit[1]
+
+    task = self._inflight.get(key)
+    if task is None:
+      task = asyncio.ensure_future(fetch())
+      self._inflight[key] = task
+      task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+    # shield: one cancelled caller must not cancel the fetch other callers are awaiting
+    value = await asyncio.shield(task)
+
+    self._entries.pop(key, None)
+    if len(self._entries) >= self.maxsize:
+      self._entries.pop(next(iter(self._entries)))
+    self._entries[key] = (time.monotonic(), value)
+    return value
+
+
+_summary_cache = _SummaryCache(ttl_seconds=SUMMARY_CACHE_TTL_SECONDS)
+
+
+async def _get_summary(user_id: str, window_days: int, headers: dict[str, str]) -> bytes:
+  # Cached as raw bytes: /summary forwards them untouched, insights/recs parse their own copy.
+  url = f"{TX_URL}/v1/banking/users/{user_id}/summary?window_days={window_days}"
+  return await _summary_cache.get((user_id, window_days), lambda: _get_raw(url, headers=headers))
+
+
 @app.get("/v1/dashboard/users/{user_id}/transactions")
 async def dashboard_transactions(
+  request: Request,
   user_id: str,
   start: str | None = None,
   end: str | None = None,
@@ -120,14 +209,22 @@ async def dashboard_transactions(
   claims: dict = Depends(require_auth(settings)),
 ):
   headers = {"x-user-id": str(claims.get("sub", user_id))}
-  qs = []
+  # Conditional GET is answered by the transaction service; relay the validator both ways.
+  if_none_match = request.headers.get("if-none-match")
+  if if_none_match:
+    headers["if-none-match"] = if_none_match
+  params: dict[str, Any] = {"limit": limit}
   if start:
-    qs.append(f"start={start}")
+    params["start"] = start
   if end:
-    qs.append(f"end={end}")
-  qs.append(f"limit={limit}")
-  q = "&".join(qs)
-  return await _get_json(f"{TX_URL}/v1/banking/users/{user_id}/transactions?{q}", headers=headers)
+    params["end"] = end
+  client: httpx.AsyncClient = app.state.http
+  r = await client.get(f"{TX_URL}/v1/banking/users/{user_id}/transactions", params=params, headers=headers)
+  _raise_for_upstream(r)
+  etag = {"ETag": r.headers["etag"]} if "etag" in r.headers else None
+  if r.status_code == 304:
+    return Response(status_code=304, headers=etag)
+  return Response(content=r.content, media_type="application/json", headers=etag)
 
 
 @app.get("/v1/dashboard/users/{user_id}/summary")
@@ -137,7 +234,7 @@ async def dashboard_summary(
   claims: dict = Depends(require_auth(settings)),
 ):
   headers = {"x-user-id": str(claims.get("sub", user_id))}
-  return await _get_json(f"{TX_URL}/v1/banking/users/{user_id}/summary?window_days={window_days}", headers=headers)
+  return Response(content=await _get_summary(user_id, window_days, headers=headers), media_type="application/json")
 
 
 @app.get("/v1/dashboard/users/{user_id}/insights")
@@ -150,7 +247,7 @@ async def dashboard_insights(
   Heuristic insight endpoint (placeholder for Behavior Detection Agent + Explainable Agent).
   """
   headers = {"x-user-id": str(claims.get("sub", user_id))}
-  summary = await _get_json(f"{TX_URL}/v1/banking/users/{user_id}/summary?window_days={window_days}", headers=headers)
+  summary = orjson.loads(await _get_summary(user_id, window_days, headers=headers))
 
   top = (summary.get("top_categories") or [])[:1]
   top_cat = top[0]["category"] if top else "Other"
@@ -200,7 +297,7 @@ async def dashboard_recommendations(
   Heuristic product rec endpoint (placeholder for Product Rec Agent + Orchestrator).
   """
   headers = {"x-user-id": str(claims.get("sub", user_id))}
-  summary = await _get_json(f"{TX_URL}/v1/banking/users/{user_id}/summary?window_days={window_days}", headers=headers)
+  summary = orjson.loads(await _get_summary(user_id, window_days, headers=headers))
   top = (summary.get("top_categories") or [])[:1]
   top_cat = top[0]["category"] if top else "Other"
   inst_ratio = float(summary.get("installment_ratio") or 0.0)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Optional
 
 import httpx
@@ -10,46 +12,95 @@ from fastapi import Depends, HTTPException, Request
 
 from .settings import CommonSettings
 
+log = logging.getLogger(__name__)
+
+
+def _max_age(cache_control: str | None) -> int | None:
+  # e.g. "public, max-age=3600, must-revalidate"
+  for directive in (cache_control or "").split(","):
+    name, _, value = directive.strip().partition("=")
+    if name.lower() == "max-age" and value.isdigit():
+      return int(value)
+  return None
+
 
 @dataclass
-class _JWKSCache:
+class JWKSCache:
+  """
+  JWKS cache owned by an app (app.state.jwks_cache); see require_auth.
+  Refreshes are single-flight (one coroutine fetches, the rest wait on the lock) and
+  rate-limited to one attempt per min_refresh_interval, so a burst of unknown-kid tokens
+  cannot stampede the IdP. On fetch failure the previously fetched keys keep being served.
+  """
+
   jwks_url: str
   ttl_seconds: int = 300
+  min_refresh_interval: float = 10.0
+  http: httpx.AsyncClient | None = None
   _fetched_at: float = 0.0
+  _attempted_at: float | None = None
+  _max_age: int | None = None
   _keys_by_kid: dict[str, dict[str, Any]] | None = None
+  # RSA public keys built once per refresh; from_jwk is too costly to repeat per request.
+  _parsed_by_kid: dict[str, Any] | None = None
+  _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
 
   def _expired(self) -> bool:
-    return not self._keys_by_kid or (time.time() - self._fetched_at) > self.ttl_seconds
+    ttl = self._max_age if self._max_age is not None else self.ttl_seconds
+    return not self._keys_by_kid or (time.monotonic() - self._fetched_at) > ttl
 
-  def get_key(self, kid: str) -> dict[str, Any] | None:
+  async def get_parsed_key(self, kid: str) -> Any | None:
     if self._expired():
-      self.refresh()
-    if not self._keys_by_kid:
+      await self.refresh()
+    if not self._parsed_by_kid:
       return None
-    return self._keys_by_kid.get(kid)
-
-  def refresh(self) -> None:
-    with httpx.Client(timeout=4.0) as client:
-      r = client.get(self.jwks_url)
-      r.raise_for_status()
-      jwks = r.json()
-    keys = jwks.get("keys", [])
-    self._keys_by_kid = {k.get("kid"): k for k in keys if k.get("kid")}
-    self._fetched_at = time.time()
-
-
-_cache: _JWKSCache | None = None
-
-
-def _get_cache(jwks_url: str) -> _JWKSCache:
-  global _cache
-  if _cache is None or _cache.jwks_url != jwks_url:
-    _cache = _JWKSCache(jwks_url=jwks_url)
-  return _cache
-
-
-def verify_jwt_token(token: str, settings: CommonSettings) -> dict[str, Any]:
-  if not settings.jwks_url:
+    return self._parsed_by_kid.get(kid)
+
+  async def _fetch(self) -> httpx.Response:
+    if self.http is not None:
+      return await self.http.get(self.jwks_url, timeout=4.0)
+    async with httpx.AsyncClient(timeout=4.0) as client:
+      return await client.get(self.jwks_url)
+
+  async def refresh(self) -> None:
+    async with self._lock:
+      # Whoever held the lock before us may have just refreshed.
+      now = time.monotonic()
+      if self._attempted_at is not None and (now - self._attempted_at) < self.min_refresh_interval:
+        return
+      self._attempted_at = now
+      try:
+        r = await self._fetch()
+        r.raise_for_status()
+        jwks = r.json()
+      except (httpx.HTTPError, ValueError):
+        if self._keys_by_kid:
+          return  # keep serving stale keys
+        raise
+      keys = jwks.get("keys", [])
+      keys_by_kid = {k.get("kid"): k for k in keys if k.get("kid")}
+      parsed_by_kid: dict[str, Any] = {}
+      for kid, k in keys_by_kid.items():
+        if k.get("kty") != "RSA":
+          continue
+        # One bad key in the set must not break tokens signed with the others.
+        try:
+          parsed_by_kid[kid] = jwt.algorithms.RSAAlgorithm.from_jwk(k)  # type: ignore[arg-type]
+        except Exception as e:
+          log.warning("skipping unusable JWKS key %s: %s", kid, e)
+      self._parsed_by_kid = parsed_by_kid
+      self._keys_by_kid = keys_by_kid
+      self._max_age = _max_age(r.headers.get("cache-control"))
+      self._fetched_at = time.monotonic()
+
+
+async def verify_jwt_token(
+  token: str,
+  cache: JWKSCache | None,
+  audience: str | None = None,
+  issuer: str | None = None,
+) -> dict[str, Any]:
+  if cache is None:
     raise HTTPException(status_code=500, detail="JWKS_URL is not configured")
 
   try:
@@ -61,26 +112,22 @@ def verify_jwt_token(token: str, settings: CommonSettings) -> dict[str, Any]:
   if not kid:
     raise HTTPException(status_code=401, detail="JWT missing kid")
 
-  jwk = _get_cache(settings.jwks_url).get_key(kid)
-  if not jwk:
-    # refresh once and retry
-    cache = _get_cache(settings.jwks_url)
-    cache.refresh()
-    jwk = cache.get_key(kid)
-  if not jwk:
+  public_key = await cache.get_parsed_key(kid)
+  if public_key is None:
+    # refresh once (subject to min_refresh_interval) and retry
+    await cache.refresh()
+    public_key = await cache.get_parsed_key(kid)
+  if public_key is None:
     raise HTTPException(status_code=401, detail="Unknown JWT kid")
 
-  public_key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)  # type: ignore[arg-type]
-  options = {"verify_aud": bool(settings.audience)}
-
   try:
     claims = jwt.decode(
       token,
       key=public_key,
       algorithms=["RS256"],
-      audience=settings.audience,
-      issuer=settings.issuer,
-      options=options,
+      audience=audience,
+      issuer=issuer,
+      options={"verify_aud": bool(audience)},
       leeway=10,
     )
   except jwt.ExpiredSignatureError:
@@ -96,16 +143,30 @@ def require_auth(settings: CommonSettings):
   FastAPI dependency.
   In local mode you can set DISABLE_AUTH=true to bypass verification.
   """
+  # Settings are fixed for the process lifetime; bind them once instead of going through
+  # pydantic attribute access on every request.
+  disable_auth = settings.disable_auth
+  jwks_url = settings.jwks_url
+  audience = settings.audience
+  issuer = settings.issuer
+
+  def _jwks_cache(request: Request) -> JWKSCache | None:
+    # Apps normally create this in their lifespan; build it lazily for apps that don't.
+    cache = getattr(request.app.state, "jwks_cache", None)
+    if cache is None and jwks_url:
+      cache = JWKSCache(jwks_url=jwks_url, http=getattr(request.app.state, "http", None))
+      request.app.state.jwks_cache = cache
+    return cache
 
   async def _dep(request: Request) -> dict[str, Any]:
-    if settings.disable_auth:
+    if disable_auth:
       return {"sub": "local-user", "scope": "local"}
 
     auth = request.headers.get("authorization") or ""
     if not auth.lower().startswith("bearer "):
       raise HTTPException(status_code=401, detail="Missing Authorization Bearer token")
     token = auth.split(" ", 1)[1].strip()
-    return verify_jwt_token(token, settings)
+    return await verify_jwt_token(token, _jwks_cache(request), audience=audience, issuer=issuer)
 
   return _dep
 
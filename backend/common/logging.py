@@ -1,28 +1,37 @@
 from __future__ import annotations
 
-import json
 import logging
+import os
 import sys
 import time
 from typing import Any
 
+import orjson
+
 
 class JsonFormatter(logging.Formatter):
   def format(self, record: logging.LogRecord) -> str:
     payload: dict[str, Any] = {
-      "ts": int(time.time() * 1000),
+      "ts": time.time_ns() // 1_000_000,
       "level": record.levelname,
       "logger": record.name,
       "msg": record.getMessage(),
     }
     if record.exc_info:
       payload["exc_info"] = self.formatException(record.exc_info)
-    return json.dumps(payload, ensure_ascii=False)
+    return orjson.dumps(payload).decode()
 
 
 def configure_logging(service_name: str) -> None:
+  # JsonFormatter never emits thread/process/caller info, so skip collecting it per record.
+  logging.logThreads = False
+  logging.logProcesses = False
+  logging.logMultiprocessing = False
+  logging._srcfile = None  # type: ignore[attr-defined]  # disables findCaller() frame walk
+
   root = logging.getLogger()
-  root.setLevel(logging.INFO)
+  # Records below this level are dropped by isEnabledFor() before any formatting happens.
+  root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
   handler = logging.StreamHandler(sys.stdout)
   handler.setFormatter(JsonFormatter())
   root.handlers = [handler]
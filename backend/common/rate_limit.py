@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 
 from fastapi import HTTPException, Request
@@ -18,6 +19,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
   """
   Simple in-memory token bucket per key.
   Intended for local dev; production rate limiting should be handled at API Gateway/WAF.
+
+  Buckets live in an LRU bounded by max_keys so a long-running process does not grow one
+  entry per distinct user/IP forever; an evicted key simply starts again with a full bucket.
   """
 
   def __init__(
@@ -27,13 +31,17 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     rps: float,
     burst: int,
     header_key: str = "x-user-id",
+    max_keys: int = 100_000,
   ):
     super().__init__(app)
     self.enabled = enabled
     self.rps = float(rps)
     self.burst = int(burst)
     self.header_key = header_key
-    self._buckets: dict[str, _Bucket] = {}
+    self.max_keys = int(max_keys)
+    self._burst_f = float(self.burst)
+    self._skip_paths = frozenset({"/healthz", "/docs", "/openapi.json"})
+    self._buckets: OrderedDict[str, _Bucket] = OrderedDict()
 
   def _key(self, request: Request) -> str:
     # Prefer user id header (gateway can inject). Fallback to client IP.
@@ -44,15 +52,21 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     return f"ip:{ip}"
 
   def _consume(self, key: str) -> None:
-    now = time.time()
-    b = self._buckets.get(key)
-    if not b:
-      b = _Bucket(tokens=float(self.burst), updated_at=now)
-      self._buckets[key] = b
+    # monotonic: wall-clock jumps (NTP) must not refill or drain buckets
+    now = time.monotonic()
+    buckets = self._buckets
+    b = buckets.get(key)
+    if b is None:
+      b = _Bucket(tokens=self._burst_f, updated_at=now)
+      buckets[key] = b
+      if len(buckets) > self.max_keys:
+        buckets.popitem(last=False)
+    else:
+      buckets.move_to_end(key)
 
     # Refill
     elapsed = max(0.0, now - b.updated_at)
-    b.tokens = min(float(self.burst), b.tokens + elapsed * self.rps)
+    b.tokens = min(self._burst_f, b.tokens + elapsed * self.rps)
     b.updated_at = now
 
     if b.tokens < 1.0:
@@ -60,8 +74,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     b.tokens -= 1.0
 
   async def dispatch(self, request: Request, call_next):
-    if self.enabled and request.url.path not in ("/healthz", "/docs", "/openapi.json"):
-      self._consume(self._key(request))
+    if not self.enabled or request.url.path in self._skip_paths:
+      return await call_next(request)
+    self._consume(self._key(request))
     resp: Response = await call_next(request)
     return resp
 
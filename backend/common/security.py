@@ -11,19 +11,25 @@ class SafetyResult:
   redacted_text: str
 
 
-PII_PATTERNS: list[tuple[str, re.Pattern[str]]] = [
-  ("email", re.compile(r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b", re.I)),
-  ("phone", re.compile(r"\b(\+?\d[\d\s\-().]{7,}\d)\b", re.I)),
+PII_PATTERNS: list[tuple[str, str]] = [
+  ("email", r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b"),
+  ("phone", r"\b\+?\d[\d\s\-().]{7,}\d\b"),
 ]
 
+# One alternation with a named group per pattern: a single pass over the text redacts every
+# kind of PII, and m.lastgroup tells which one matched. Earlier patterns win at a position.
+PII_RE: re.Pattern[str] = re.compile("|".join(f"(?P<{name}>{pat})" for name, pat in PII_PATTERNS), re.I)
+
 
 def redact_pii(text: str) -> tuple[str, list[str]]:
-  reasons: list[str] = []
-  redacted = text
-  for name, pat in PII_PATTERNS:
-    if pat.search(redacted):
-      reasons.append(f"pii:{name}")
-      redacted = pat.sub("[REDACTED]", redacted)
+  found: set[str] = set()
+
+  def _repl(m: re.Match[str]) -> str:
+    found.add(m.lastgroup)  # type: ignore[arg-type]
+    return "[REDACTED]"
+
+  redacted = PII_RE.sub(_repl, text)
+  reasons = [f"pii:{name}" for name, _ in PII_PATTERNS if name in found]
   return redacted, reasons
 
 
@@ -45,17 +51,19 @@ def safety_filter_user_input(text: str) -> SafetyResult:
   return SafetyResult(allowed=True, reasons=reasons, redacted_text=redacted)
 
 
+_DISCLAIMER = (
+  "\n\nDisclaimer: This is informational guidance, not a financial decision. "
+  "Please consult a qualified advisor before acting."
+)
+# An existing disclaimer is expected at the end of the text; only this tail is searched.
+_DISCLAIMER_TAIL = len(_DISCLAIMER) + 32
+
+
 def enforce_no_autodecision(output_text: str) -> str:
   """
   Ensures assistant output stays in recommendation-only mode.
   In production: use a classifier + policy engine. Here: add a standard disclaimer.
   """
-  disclaimer = (
-    "\n\nDisclaimer: This is informational guidance, not a financial decision. "
-    "Please consult a qualified advisor before acting."
-  )
-  if "Disclaimer:" in output_text:
+  if output_text.find("Disclaimer:", max(0, len(output_text) - _DISCLAIMER_TAIL)) >= 0:
     return output_text
-  return output_text + disclaimer
-
-
+  return output_text + _DISCLAIMER
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Literal
+from typing import AsyncIterator, BinaryIO, Literal
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 from common.logging import configure_logging
@@ -25,11 +29,77 @@ from .openai_client import maybe_llm_summarize
 
 settings = CommonSettings(service_name="conversation_service")
 configure_logging("conversation_service")
+log = logging.getLogger(__name__)
+
+FEEDBACK_BATCH_MAX = 256
+
+
+def _write_feedback_batch(f: BinaryIO, batch: list[bytes]) -> None:
+  f.write(b"\n".join(batch) + b"\n")
+  f.flush()
+
+
+async def _feedback_writer(queue: asyncio.Queue[bytes | None], fp: Path) -> None:
+  """
+  Drains queued feedback lines into the JSONL file in batches.
+  A None item is the shutdown sentinel: everything queued before it is written first.
+  File open/write/flush run in a worker thread so disk latency never stalls the event loop.
+  A failed batch is logged and dropped so the queue keeps draining; if the file can't be
+  opened at all the task ends, and post_feedback reports feedback as not stored.
+  """
+  try:
+    f = await asyncio.to_thread(fp.open, "ab")
+  except OSError:
+    log.exception("cannot open feedback file %s", fp)
+    return
+  try:
+    while True:
+      item = await queue.get()
+      stop = item is None
+      batch: list[bytes] = [] if stop else [item]
+      while not stop and len(batch) < FEEDBACK_BATCH_MAX:
+        try:
+          item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+          break
+        if item is None:
+          stop = True
+        else:
+          batch.append(item)
+      if batch:
+        try:
+          await asyncio.to_thread(_write_feedback_batch, f, batch)
+        except OSError:
+          log.exception("dropped %d feedback records", len(batch))
+      if stop:
+        return
+  finally:
+    await asyncio.to_thread(f.close)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+  # For scaffolding: append JSONL locally. In production: Kafka topic + warehouse.
+  base = Path(os.environ.get("FEEDBACK_DIR", os.path.join(os.path.dirname(__file__), "../../../backend_data")))
+  # Created once per process here rather than on every feedback request.
+  base.mkdir(parents=True, exist_ok=True)
+  queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+  app.state.feedback_queue = queue
+  writer = asyncio.create_task(_feedback_writer(queue, base / "conversation_feedback.jsonl"))
+  app.state.feedback_writer = writer
+  try:
+    yield
+  finally:
+    await queue.put(None)
+    await writer
+
 
 app = FastAPI(
   title="Conversation Service",
   version="0.1.0",
   description="Conversation context, summarization, intent/emotion detection, and feedback collection.",
+  lifespan=lifespan,
+  default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -148,18 +218,16 @@ class FeedbackOut(BaseModel):
 
 
 @app.post("/v1/conversation/feedback", response_model=FeedbackOut)
-def post_feedback(payload: FeedbackIn) -> FeedbackOut:
-  # For scaffolding: append JSONL locally. In production: Kafka topic + warehouse.
-  base = Path(os.environ.get("FEEDBACK_DIR", os.path.join(os.path.dirname(__file__), "../../../backend_data")))
-  base.mkdir(parents=True, exist_ok=True)
-  fp = base / "conversation_feedback.jsonl"
-  with fp.open("a", encoding="utf-8") as f:
-    f.write(json.dumps(payload.model_dump(), ensure_ascii=False) + "\n")
+async def post_feedback(payload: FeedbackIn) -> FeedbackOut:
+  # Queued for the background writer (see lifespan); the request never touches the file.
+  if app.state.feedback_writer.done():
+    raise HTTPException(status_code=503, detail="Feedback storage unavailable")
+  await app.state.feedback_queue.put(orjson.dumps(payload.model_dump()))
   return FeedbackOut(ok=True, stored=True)
 
 
 @app.post("/v1/chat/feedback", response_model=FeedbackOut)
-def chat_feedback(payload: FeedbackIn) -> FeedbackOut:
-  return post_feedback(payload)
+async def chat_feedback(payload: FeedbackIn) -> FeedbackOut:
+  return await post_feedback(payload)
 
 
@@ -20,31 +20,56 @@ def summarize_context(history: list[dict[str, Any]] | list[Any]) -> str:
   return f"Recent user topics:\n{bullets}"
 
 
+_INTENT_RULES: list[tuple[str, float, str]] = [
+  ("loan", 0.85, r"loan|vay|mortgage|interest|lãi suất"),
+  ("travel", 0.8, r"travel|du lịch|flight|hotel|vé máy bay|khách sạn"),
+  ("saving", 0.8, r"saving|tiết kiệm|deposit|gửi góp|lãi kép"),
+  ("credit", 0.75, r"credit|thẻ tín dụng|limit|cashback|points"),
+  ("insurance", 0.75, r"insurance|bảo hiểm|policy|premium"),
+  ("spending", 0.7, r"spending|chi tiêu|budget|ngân sách|transaction|giao dịch"),
+  ("investment", 0.7, r"invest|đầu tư|stock|fund|bond|ETF|cổ phiếu"),
+]
+
+_EMOTION_RULES: list[tuple[str, float, str]] = [
+  ("stress", 0.8, r"urgent|gấp|kẹt|overdue|nợ|debt|stress|áp lực"),
+  ("concern", 0.75, r"worried|lo|concern|sợ|không biết"),
+  ("excitement", 0.75, r"great|tuyệt|excited|hào hứng|được rồi|yay"),
+]
+
+
+def _compile_rules(rules: list[tuple[str, float, str]]) -> re.Pattern[str]:
+  # One zero-width alternation over all rules: at each position the lowest-index (highest
+  # priority) rule that matches is reported, so a single scan finds the best rule overall.
+  return re.compile("(?=" + "|".join(f"(?P<r{i}>{pat})" for i, (_, _, pat) in enumerate(rules)) + ")", re.I)
+
+
+_INTENT_RE = _compile_rules(_INTENT_RULES)
+_EMOTION_RE = _compile_rules(_EMOTION_RULES)
+
+
+def _best_rule(union: re.Pattern[str], text: str) -> int | None:
+  best: int | None = None
+  for m in union.finditer(text):
+    idx = m.lastindex - 1  # type: ignore[operator]
+    if best is None or idx < best:
+      best = idx
+      if best == 0:
+        break
+  return best
+
+
 def detect_intent(text: str) -> dict[str, Any]:
-  t = text.lower()
-  rules: list[tuple[str, float, bool]] = [
-    ("loan", 0.85, bool(re.search(r"(loan|vay|mortgage|interest|lãi suất)", t, re.I))),
-    ("travel", 0.8, bool(re.search(r"(travel|du lịch|flight|hotel|vé máy bay|khách sạn)", t, re.I))),
-    ("saving", 0.8, bool(re.search(r"(saving|tiết kiệm|deposit|gửi góp|lãi kép)", t, re.I))),
-    ("credit", 0.75, bool(re.search(r"(credit|thẻ tín dụng|limit|cashback|points)", t, re.I))),
-    ("insurance", 0.75, bool(re.search(r"(insurance|bảo hiểm|policy|premium)", t, re.I))),
-    ("spending", 0.7, bool(re.search(r"(spending|chi tiêu|budget|ngân sách|transaction|giao dịch)", t, re.I))),
-    ("investment", 0.7, bool(re.search(r"(invest|đầu tư|stock|fund|bond|ETF|cổ phiếu)", t, re.I))),
-  ]
-  for label, conf, hit in rules:
-    if hit:
-      return {"label": label, "confidence": conf}
+  # Rules are ordered by priority; patterns are case-insensitive so no lower() copy is needed.
+  idx = _best_rule(_INTENT_RE, text)
+  if idx is not None:
+    label, conf, _ = _INTENT_RULES[idx]
+    return {"label": label, "confidence": conf}
   return {"label": "unknown", "confidence": 0.4}
 
 
 def detect_emotion(text: str) -> dict[str, Any]:
-  t = text.lower()
-  if re.search(r"(urgent|gấp|kẹt|overdue|nợ|debt|stress|áp lực)", t, re.I):
-    return {"label": "stress", "confidence": 0.8}
-  if re.search(r"(worried|lo|concern|sợ|không biết)", t, re.I):
-    return {"label": "concern", "confidence": 0.75}
-  if re.search(r"(great|tuyệt|excited|hào hứng|được rồi|yay)", t, re.I):
-    return {"label": "excitement", "confidence": 0.75}
+  idx = _best_rule(_EMOTION_RE, text)
+  if idx is not None:
+    label, conf, _ = _EMOTION_RULES[idx]
+    return {"label": label, "confidence": conf}
   return {"label": "neutral", "confidence": 0.7}
-
-
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import hashlib
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import date
-from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 
-from fastapi import FastAPI, HTTPException, Query
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 from common.logging import configure_logging
@@ -15,11 +23,14 @@ from common.settings import CommonSettings
 from common.auth import require_auth
 from common.rate_limit import RateLimitMiddleware
 
-from .normalize import map_to_category, synthetic_installment
+from .normalize import NORMALIZED_COLUMNS, normalized_mismatch, normalized_sql
 
 
 settings = CommonSettings(service_name="transaction_service")
 configure_logging("transaction_service")
+log = logging.getLogger(__name__)
+
+BANKING_TX_CACHE_TTL_SECONDS = float(os.environ.get("BANKING_TX_CACHE_TTL_SECONDS", "30"))
 
 
 def dataset_path(filename: str) -> str:
@@ -35,6 +46,7 @@ def dataset_path(filename: str) -> str:
 
 def _duckdb_path_literal(p: str) -> str:
   # DuckDB works well with forward slashes on Windows; also escape quotes.
+  # Only for statements that can't take a bound parameter (COPY ... TO).
   return p.replace("\\", "/").replace("'", "''")
 
 
@@ -48,10 +60,13 @@ def _db_file_path() -> str:
   return str(out_dir / "transaction_service.duckdb")
 
 
-@lru_cache(maxsize=1)
+_DB_FILE_PATH = _db_file_path()
+
+
 def _ensure_db_loaded() -> str:
   """
   Load FAR-Trans CSVs into an on-disk DuckDB database once per service process.
+  Only called while opening the shared connection (see _shared_db), so it needs no cache.
 
   This avoids:
   - repeated CSV scans on each request
@@ -66,101 +81,199 @@ def _ensure_db_loaded() -> str:
       "  cd backend && python -m pip install -r requirements.txt"
     ) from e
 
-  db_path = _db_file_path()
+  db_path = _DB_FILE_PATH
+  required = {"transactions", "transactions.category", "tx_cust", "assets", "markets", "assets_by_isin"}
+
+  def _catalog(con: Any) -> set[str]:
+    # One catalog lookup for every table/index we create below.
+    return {
+      r[0]
+      for r in con.execute(
+        """
+        SELECT table_name FROM duckdb_tables() WHERE schema_name = 'main'
+        UNION ALL
+        SELECT index_name FROM duckdb_indexes() WHERE schema_name = 'main'
+        UNION ALL
+        SELECT 'transactions.' || column_name FROM duckdb_columns()
+        WHERE schema_name = 'main' AND table_name = 'transactions' AND column_name = 'category'
+        """
+      ).fetchall()
+    }
+
+  # A populated file returns here without a read-write open: other workers hold read-only
+  # connections to it for their whole life, and DuckDB refuses a writer next to them.
+  if os.path.exists(db_path):
+    con = duckdb.connect(database=db_path, read_only=True)
+    try:
+      if _catalog(con) >= required and normalized_mismatch(con, "transactions") is None:
+        return db_path
+    finally:
+      con.close()
+
   con = duckdb.connect(database=db_path)
+  existing = _catalog(con)
+  tx_source = "transactions"
+  if "transactions.category" in existing and normalized_mismatch(con, "transactions") is not None:
+    # Written by an older normalize.py: recompute the stored columns in place below.
+    existing.discard("transactions.category")
+    tx_source = f"(SELECT * EXCLUDE ({', '.join(NORMALIZED_COLUMNS)}) FROM transactions)"
+  if existing >= required:
+    con.close()
+    return db_path
 
   # Make memory use more predictable in dev; can override via env.
   mem_limit = os.environ.get("DUCKDB_MEMORY_LIMIT", "512MB")
   con.execute("SET enable_progress_bar=false;")
   con.execute(f"SET memory_limit='{mem_limit}';")
   # Slightly reduce peak memory on some Windows setups.
-  try:
-    con.execute("SET preserve_insertion_order=false;")
-  except Exception:
-    pass
+  con.execute("SET preserve_insertion_order=false;")
+  # CSV parsing on first load is CPU-bound; let the parallel reader use every core.
+  con.execute(f"SET threads={int(os.environ.get('DUCKDB_THREADS') or os.cpu_count() or 1)};")
 
-  tx_path = _duckdb_path_literal(dataset_path("transactions.csv"))
-  assets_path = _duckdb_path_literal(dataset_path("asset_information.csv"))
-  markets_path = _duckdb_path_literal(dataset_path("markets.csv"))
   only_customer_id = os.environ.get("TX_ONLY_CUSTOMER_ID")
+  parquet_dir = Path(db_path).parent / "far_trans_parquet"
+  parquet_dir.mkdir(parents=True, exist_ok=True)
 
-  def _has_table(name: str) -> bool:
-    return (
+  def _parquet_source(name: str, csv_filename: str, columns_sql: str) -> str:
+    """
+    Returns the path of a zstd Parquet copy of `csv_filename`, for read_parquet(?). The CSV
+    is parsed once per version into it, so rebuilding the DuckDB file later never re-parses
+    an unchanged CSV. The copy's name carries the CSV's path, size and mtime; a different
+    DATASET_DIR or an updated CSV gets a fresh copy instead of the old data.
+    """
+    csv_path = dataset_path(csv_filename)
+    st = os.stat(csv_path)
+    key = f"{os.path.abspath(csv_path)}|{st.st_size}|{st.st_mtime_ns}"
+    pq = parquet_dir / f"{name}-{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}.parquet"
+    if not pq.exists():
+      for stale in parquet_dir.glob(f"{name}-*.parquet"):
+        stale.unlink(missing_ok=True)
+      tmp = pq.with_name(pq.name + ".tmp")
+      # Source paths are bound as parameters; COPY's target can't be, and is our own path.
       con.execute(
-        "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema='main' AND table_name=?",
-        [name],
-      ).fetchone()[0]
-      > 0
+        f"""
+        COPY (
+          SELECT * FROM read_csv(?, header=true, parallel=true, columns={columns_sql})
+        ) TO '{_duckdb_path_literal(str(tmp))}' (FORMAT PARQUET, COMPRESSION 'zstd', ROW_GROUP_SIZE 100000);
+        """,
+        [csv_path],
+      )
+      os.replace(tmp, pq)
+    return str(pq)
+
+  if "transactions" in existing and "transactions.category" not in existing:
+    # Built before the normalized columns existed, or by an older normalize.py (no Parquet
+    # copy, maybe no CSVs either): derive them from the rows already in the file, and only
+    # swap once the new table exists.
+    con.execute("SET preserve_insertion_order=true;")
+    con.execute("BEGIN TRANSACTION;")
+    con.execute(
+      f"""
+      CREATE TABLE transactions_new AS
+        SELECT * FROM ({normalized_sql(tx_source)})
+        ORDER BY customerID, timestamp;
+      """
     )
+    con.execute("DROP TABLE transactions;")
+    con.execute("ALTER TABLE transactions_new RENAME TO transactions;")
+    con.execute("COMMIT;")
+    con.execute("SET preserve_insertion_order=false;")
+    existing -= {"tx_cust"}
 
   # IMPORTANT:
   # - Avoid read_csv_auto() (can OOM due to type inference).
   # - Persist tables into DuckDB file so we don't redo work per request.
-  if not _has_table("transactions"):
+  if "transactions" not in existing:
+    tx_src = _parquet_source(
+      "transactions",
+      "transactions.csv",
+      """{
+        'customerID': 'VARCHAR',
+        'ISIN': 'VARCHAR',
+        'transactionID': 'BIGINT',
+        'transactionType': 'VARCHAR',
+        'timestamp': 'DATE',
+        'totalValue': 'DOUBLE',
+        'units': 'DOUBLE',
+        'channel': 'VARCHAR',
+        'marketID': 'VARCHAR'
+      }""",
+    )
+    tx_params: list[Any] = [tx_src]
+    tx_filtered = "(SELECT * FROM read_parquet(?))"
+    if only_customer_id:
+      tx_filtered = "(SELECT * FROM read_parquet(?) WHERE customerID = ?)"
+      tx_params.append(only_customer_id)
+    # Physically cluster by customer so the per-row-group zone maps on customerID/timestamp
+    # let `WHERE customerID = ?` skip almost every row group. Insertion order must be
+    # preserved for this one statement or the ORDER BY would not survive the write.
+    # The deterministic category/installment columns (normalize.py) are stored alongside,
+    # so banking requests read them instead of hashing every row again.
+    con.execute("SET preserve_insertion_order=true;")
     con.execute(
       f"""
       CREATE TABLE transactions AS
-        SELECT * FROM read_csv(
-          '{tx_path}',
-          header=true,
-          columns={{
-            'customerID': 'VARCHAR',
-            'ISIN': 'VARCHAR',
-            'transactionID': 'BIGINT',
-            'transactionType': 'VARCHAR',
-            'timestamp': 'DATE',
-            'totalValue': 'DOUBLE',
-            'units': 'DOUBLE',
-            'channel': 'VARCHAR',
-            'marketID': 'VARCHAR'
-          }},
-          dateformat='%Y-%m-%d'
-        )
-        {"WHERE customerID = '" + _duckdb_path_literal(only_customer_id) + "'" if only_customer_id else ""};
-      """
+        SELECT * FROM ({normalized_sql(tx_filtered)})
+        ORDER BY customerID, timestamp;
+      """,
+      tx_params,
     )
+    con.execute("SET preserve_insertion_order=false;")
 
-  if not _has_table("assets"):
-    con.execute(
-      f"""
-      CREATE TABLE assets AS
-        SELECT * FROM read_csv(
-          '{assets_path}',
-          header=true,
-          columns={{
-            'ISIN': 'VARCHAR',
-            'assetName': 'VARCHAR',
-            'assetShortName': 'VARCHAR',
-            'assetCategory': 'VARCHAR',
-            'assetSubCategory': 'VARCHAR',
-            'marketID': 'VARCHAR',
-            'sector': 'VARCHAR',
-            'industry': 'VARCHAR',
-            'timestamp': 'DATE'
-          }},
-          dateformat='%Y-%m-%d'
-        );
-      """
+  if "tx_cust" not in existing:
+    con.execute("CREATE INDEX tx_cust ON transactions(customerID);")
+
+  if "transactions.category" not in existing:
+    # Just computed by normalized_sql; it must agree with the Python functions it mirrors.
+    mismatch = normalized_mismatch(con, "transactions")
+    if mismatch is not None:
+      con.close()
+      raise RuntimeError(f"normalized_sql disagrees with normalize.py: {mismatch}")
+
+  if "assets" not in existing:
+    assets_src = _parquet_source(
+      "assets",
+      "asset_information.csv",
+      """{
+        'ISIN': 'VARCHAR',
+        'assetName': 'VARCHAR',
+        'assetShortName': 'VARCHAR',
+        'assetCategory': 'VARCHAR',
+        'assetSubCategory': 'VARCHAR',
+        'marketID': 'VARCHAR',
+        'sector': 'VARCHAR',
+        'industry': 'VARCHAR',
+        'timestamp': 'DATE'
+      }""",
+    )
+    con.execute("CREATE TABLE assets AS SELECT * FROM read_parquet(?);", [assets_src])
+
+  if "markets" not in existing:
+    markets_src = _parquet_source(
+      "markets",
+      "markets.csv",
+      """{
+        'exchangeID': 'VARCHAR',
+        'marketID': 'VARCHAR',
+        'name': 'VARCHAR',
+        'description': 'VARCHAR',
+        'country': 'VARCHAR',
+        'tradingDays': 'VARCHAR',
+        'tradingHours': 'VARCHAR',
+        'marketClass': 'VARCHAR'
+      }""",
     )
+    con.execute("CREATE TABLE markets AS SELECT * FROM read_parquet(?);", [markets_src])
 
-  if not _has_table("markets"):
+  if "assets_by_isin" not in existing:
+    # assets has several rows per ISIN; collapse them once here so request queries
+    # hash-join a small ISIN -> attributes table instead of running DISTINCT ON each time.
     con.execute(
-      f"""
-      CREATE TABLE markets AS
-        SELECT * FROM read_csv(
-          '{markets_path}',
-          header=true,
-          columns={{
-            'exchangeID': 'VARCHAR',
-            'marketID': 'VARCHAR',
-            'name': 'VARCHAR',
-            'description': 'VARCHAR',
-            'country': 'VARCHAR',
-            'tradingDays': 'VARCHAR',
-            'tradingHours': 'VARCHAR',
-            'marketClass': 'VARCHAR'
-          }}
-        );
+      """
+      CREATE TABLE assets_by_isin AS
+        SELECT DISTINCT ON (ISIN) ISIN, assetName, assetCategory
+        FROM assets
+        ORDER BY ISIN, timestamp DESC;
       """
     )
 
@@ -168,12 +281,29 @@ def _ensure_db_loaded() -> str:
   return db_path
 
 
-def get_db() -> Any:
-  """
-  Returns a connection for the request.
+_db_lock = threading.Lock()
+_db_con: Any = None
+# Identifies the loaded dataset in ETags; taken from the database file when it is opened.
+_db_version = ""
 
-  We use an on-disk DuckDB database created once at startup to avoid OOM.
+
+def _shared_db() -> Any:
+  """
+  One read-only connection per worker process, opened and configured once.
+  Requests get cheap cursors on it instead of re-opening the database file.
   """
+  global _db_con
+  if _db_con is not None:
+    return _db_con
+  # First requests race here from the threadpool; the loader opens the file read-write,
+  # which fails while another thread already holds a read-only connection.
+  with _db_lock:
+    if _db_con is None:
+      _db_con = _open_shared_db()
+  return _db_con
+
+
+def _open_shared_db() -> Any:
   try:
     import duckdb  # type: ignore
   except ModuleNotFoundError as e:
@@ -182,7 +312,10 @@ def get_db() -> Any:
       "  cd backend && python -m pip install -r requirements.txt"
     ) from e
 
+  global _db_version
   db_path = _ensure_db_loaded()
+  st = os.stat(db_path)
+  _db_version = f"{st.st_mtime_ns}-{st.st_size}"
   con = duckdb.connect(database=db_path, read_only=True)
   mem_limit = os.environ.get("DUCKDB_MEMORY_LIMIT", "512MB")
   con.execute("SET enable_progress_bar=false;")
@@ -190,19 +323,98 @@ def get_db() -> Any:
   return con
 
 
+def get_db() -> Any:
+  """
+  Returns a cursor for the request.
+
+  We use an on-disk DuckDB database created once at startup to avoid OOM.
+  Cursors share the worker's connection (and its settings) but are safe to use per thread.
+  """
+  return _shared_db().cursor()
+
+
 def _fetch_dicts(con: Any, q: str, params: list[Any] | None = None) -> list[dict[str, Any]]:
   res = con.execute(q, params or [])
-  cols = [c[0] for c in (res.description or [])]
-  out: list[dict[str, Any]] = []
-  for row in res.fetchall():
-    out.append({cols[i]: row[i] for i in range(len(cols))})
-  return out
+  cols = tuple(c[0] for c in (res.description or ()))
+  return [dict(zip(cols, row)) for row in res.fetchall()]
+
+
+def _etag(*parts: Any) -> str:
+  # Weak: the body is only equivalent across workers/restarts, rows with equal timestamps
+  # may come back in a different order.
+  _shared_db()
+  raw = "|".join(str(p) for p in (*parts, _db_version))
+  return f'W/"{hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+  header = request.headers.get("if-none-match")
+  if not header:
+    return False
+  tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+  return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def _model_response(model: BaseModel) -> ORJSONResponse:
+  # Returning a Response bypasses FastAPI's response_model validation + jsonable_encoder;
+  # response_model stays on the route for the OpenAPI schema.
+  return ORJSONResponse(model.model_dump())
+
+
+def _stream_json_array(con: Any, q: str, params: list[Any] | None = None, batch_size: int = 256) -> StreamingResponse:
+  """
+  `q` must select a single column holding each row's JSON object text (DuckDB's to_json).
+  Executes it now (so SQL errors still surface as a normal 500) and streams the rows as a
+  JSON array, `batch_size` rows at a time: no per-row dicts or Python-side serialization.
+  """
+  res = con.execute(q, params or [])
+
+  def _chunks() -> Iterator[bytes]:
+    yield b"["
+    sep = b""
+    while rows := res.fetchmany(batch_size):
+      yield sep + ",".join(row[0] for row in rows).encode()
+      sep = b","
+    yield b"]"
+
+  return StreamingResponse(_chunks(), media_type="application/json")
+
+
+def _prewarm_db() -> None:
+  # count(*) is answered from metadata; aggregate the columns the handlers actually read
+  # so their pages are in the buffer pool before the first request.
+  con = get_db()
+  con.execute(
+    """
+    SELECT count(customerID), max(timestamp), sum(totalValue),
+           count(transactionType), count(ISIN), count(channel), count(marketID)
+    FROM transactions
+    """
+  ).fetchall()
+  con.execute("SELECT count(assetName), count(assetCategory) FROM assets_by_isin").fetchall()
+  con.execute("SELECT count(name), count(country) FROM markets").fetchall()
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+  try:
+    from duckdb import Error as DuckDBError  # type: ignore
+  except ModuleNotFoundError:
+    DuckDBError = RuntimeError  # _prewarm_db reports the missing module as RuntimeError
+  try:
+    _prewarm_db()
+  except (FileNotFoundError, RuntimeError, DuckDBError) as e:
+    # Keep serving /healthz; data endpoints will surface the same error per request.
+    log.warning("skipping DuckDB prewarm: %s", e)
+  yield
 
 
 app = FastAPI(
   title="Transaction Service",
   version="0.1.0",
   description="Mock core-banking transaction APIs backed by FAR-Trans (CSV).",
+  lifespan=lifespan,
+  default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -270,43 +482,62 @@ class TransactionOut(BaseModel):
 
 @app.get("/v1/users/{customer_id}/transactions", response_model=list[TransactionOut])
 def get_transactions(
+  request: Request,
   customer_id: str,
   start: date | None = Query(default=None, description="YYYY-MM-DD"),
   end: date | None = Query(default=None, description="YYYY-MM-DD"),
   limit: int = Query(default=200, ge=1, le=2000),
   _claims: dict = require_auth(settings),
-) -> list[TransactionOut]:
+) -> Response:
+  etag = _etag("transactions", customer_id, start, end, limit)
+  if _not_modified(request, etag):
+    return Response(status_code=304, headers={"ETag": etag})
   con = get_db()
-  where = ["t.customerID = ?"]
+  # date objects, not isoformat() strings: DuckDB won't compare a VARCHAR parameter to DATE.
+  where = ["customerID = ?"]
   params: list[Any] = [customer_id]
   if start:
-    where.append("t.timestamp >= ?")
-    params.append(start.isoformat())
+    where.append("timestamp >= ?")
+    params.append(start)
   if end:
-    where.append("t.timestamp <= ?")
-    params.append(end.isoformat())
+    where.append("timestamp <= ?")
+    params.append(end)
+  params.append(limit)
 
+  # Each row is rendered to JSON by DuckDB under the TransactionOut aliases. Non-finite
+  # doubles become null (as orjson would); NaN/Infinity literals are not valid JSON.
   q = f"""
-    SELECT
-      t.*,
-      a.assetName AS asset_name,
-      a.assetCategory AS asset_category,
-      m.name AS market_name,
-      m.country AS market_country
-    FROM transactions t
-    LEFT JOIN (
-      SELECT DISTINCT ON (ISIN) ISIN, assetName, assetCategory, marketID
-      FROM assets
-    ) a USING (ISIN)
+    SELECT to_json({{
+      'customerID': CAST(t.customerID AS VARCHAR),
+      'transactionID': CAST(t.transactionID AS VARCHAR),
+      'transactionType': t.transactionType,
+      'ISIN': t.ISIN,
+      'timestamp': t.timestamp,
+      'totalValue': CASE WHEN isfinite(t.totalValue) THEN t.totalValue END,
+      'units': CASE WHEN isfinite(t.units) THEN t.units END,
+      'channel': t.channel,
+      'marketID': CAST(t.marketID AS VARCHAR),
+      'asset_name': a.assetName,
+      'asset_category': a.assetCategory,
+      'market_name': m.name,
+      'market_country': m.country
+    }})::VARCHAR
+    FROM (
+      -- top-N first, so the lookups join at most `limit` rows
+      SELECT *
+      FROM transactions
+      WHERE {" AND ".join(where)}
+      ORDER BY timestamp DESC
+      LIMIT ?
+    ) t
+    LEFT JOIN assets_by_isin a USING (ISIN)
     LEFT JOIN markets m USING (marketID)
-    WHERE {" AND ".join(where)}
     ORDER BY t.timestamp DESC
-    LIMIT {limit}
   """
-  rows = _fetch_dicts(con, q, params)
-  if not rows:
-    return []
-  return rows
+  # No models are validated per row (response_model stays for the OpenAPI schema).
+  resp = _stream_json_array(con, q, params)
+  resp.headers["ETag"] = etag
+  return resp
 
 
 class UserSummaryOut(BaseModel):
@@ -324,7 +555,7 @@ def user_summary(
   customer_id: str,
   window_days: int = Query(default=90, ge=7, le=365),
   _claims: dict = require_auth(settings),
-) -> UserSummaryOut:
+) -> Response:
   """
   NOTE: This endpoint is debugged in local dev by surfacing the real error message.
   In production you would not return raw exception details.
@@ -334,14 +565,16 @@ def user_summary(
 
   try:
     con = get_db()
+    # One statement and one aggregation pass for both the totals and the per-category rows:
+    # GROUPING SETS ((), (asset_category)) yields the grand total (is_total = 1) first.
     q = """
-      WITH anchor AS (
+      WITH anchor AS MATERIALIZED (
         SELECT MAX(CAST(timestamp AS DATE)) AS as_of
         FROM transactions
         WHERE customerID = ?
       ),
-      user_tx AS (
-        SELECT t.*
+      user_tx AS MATERIALIZED (
+        SELECT t.transactionType, t.totalValue, t.ISIN
         FROM transactions t, anchor a
         WHERE t.customerID = ?
           AND a.as_of IS NOT NULL
@@ -349,25 +582,28 @@ def user_summary(
       ),
       enriched AS (
         SELECT
-          ut.*,
-          a.assetCategory AS asset_category
+          ut.transactionType,
+          ut.totalValue,
+          COALESCE(a.assetCategory, 'Unknown') AS asset_category
         FROM user_tx ut
-        LEFT JOIN (
-          SELECT DISTINCT ON (ISIN) ISIN, assetCategory
-          FROM assets
-        ) a USING (ISIN)
+        LEFT JOIN assets_by_isin a USING (ISIN)
       )
       SELECT
-        SUM(CASE WHEN transactionType='Buy' THEN totalValue ELSE 0 END) AS buys,
-        SUM(CASE WHEN transactionType='Sell' THEN totalValue ELSE 0 END) AS sells,
-        (SUM(CASE WHEN transactionType='Sell' THEN totalValue ELSE 0 END)
-         - SUM(CASE WHEN transactionType='Buy' THEN totalValue ELSE 0 END)) AS net_flow,
-        COUNT(*) AS tx_count
-      FROM enriched;
+        GROUPING(asset_category) AS is_total,
+        asset_category,
+        COALESCE(SUM(totalValue) FILTER (WHERE transactionType='Buy'), 0) AS buys,
+        COALESCE(SUM(totalValue) FILTER (WHERE transactionType='Sell'), 0) AS sells,
+        COUNT(*) AS n,
+        SUM(totalValue) AS total_value
+      FROM enriched
+      GROUP BY GROUPING SETS ((), (asset_category))
+      ORDER BY is_total DESC, total_value DESC;
     """
-    buys, sells, net_flow, tx_count = con.execute(q, [customer_id, customer_id, window_days]).fetchone()
+    # At most a handful of rows come back: unpack the tuples directly.
+    rows = con.execute(q, [customer_id, customer_id, window_days]).fetchall()
+    _, _, buys, sells, tx_count, _ = rows[0]
     if tx_count == 0:
-      return UserSummaryOut(
+      return _model_response(UserSummaryOut.model_construct(
         customer_id=customer_id,
         window_days=window_days,
         buys=0.0,
@@ -375,48 +611,24 @@ def user_summary(
         net_flow=0.0,
         tx_count=0,
         top_asset_categories=[],
-      )
+      ))
 
-    q2 = """
-      WITH anchor AS (
-        SELECT MAX(CAST(timestamp AS DATE)) AS as_of
-        FROM transactions
-        WHERE customerID = ?
-      ),
-      user_tx AS (
-        SELECT t.*
-        FROM transactions t, anchor a
-        WHERE t.customerID = ?
-          AND a.as_of IS NOT NULL
-          AND CAST(t.timestamp AS DATE) >= (a.as_of - (? || ' days')::INTERVAL)
-      ),
-      enriched AS (
-        SELECT
-          ut.*,
-          COALESCE(a.assetCategory, 'Unknown') AS asset_category
-        FROM user_tx ut
-        LEFT JOIN (
-          SELECT DISTINCT ON (ISIN) ISIN, assetCategory
-          FROM assets
-        ) a USING (ISIN)
-      )
-      SELECT asset_category, COUNT(*) AS n, SUM(totalValue) AS total_value
-      FROM enriched
-      GROUP BY 1
-      ORDER BY total_value DESC
-      LIMIT 5;
-    """
-    top = _fetch_dicts(con, q2, [customer_id, customer_id, window_days])
+    top = [
+      {"asset_category": category, "n": n, "total_value": total_value}
+      for _, category, _, _, n, total_value in rows[1:6]
+    ]
 
-    return UserSummaryOut(
+    # Trusted, already-typed values (DuckDB results cast above): skip constructor validation
+    # and, by returning a Response, FastAPI's response_model re-validation/encoding as well.
+    return _model_response(UserSummaryOut.model_construct(
       customer_id=customer_id,
       window_days=window_days,
-      buys=float(buys or 0),
-      sells=float(sells or 0),
-      net_flow=float(net_flow or 0),
+      buys=float(buys),
+      sells=float(sells),
+      net_flow=float(sells) - float(buys),
       tx_count=int(tx_count),
       top_asset_categories=top,
-    )
+    ))
   except Exception as e:  # pragma: no cover - local debug helper
     # In local dev, surface the real error so we can fix it.
     traceback.print_exc()
@@ -447,74 +659,132 @@ class BankingTransactionOut(BaseModel):
   installment: InstallmentOut | None = None
 
 
+@dataclass
+class _TTLCache:
+  """
+  Small thread-safe LRU with a per-entry TTL. Sync endpoints run in the threadpool,
+  hence the lock.
+  """
+
+  ttl_seconds: float = 30.0
+  maxsize: int = 1024
+  _entries: OrderedDict[Any, tuple[float, Any]] = field(default_factory=OrderedDict)
+  _lock: threading.Lock = field(default_factory=threading.Lock)
+
+  def get(self, key: Any) -> Any | None:
+    with self._lock:
+      hit = self._entries.get(key)
+      if hit is None:
+        return None
+      if (time.monotonic() - hit[0]) > self.ttl_seconds:
+        del self._entries[key]
+        return None
+      self._entries.move_to_end(key)
+      return hit[1]
+
+  def put(self, key: Any, value: Any) -> None:
+    with self._lock:
+      self._entries[key] = (time.monotonic(), value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.maxsize:
+        self._entries.popitem(last=False)
+
+
+_banking_tx_cache = _TTLCache(ttl_seconds=BANKING_TX_CACHE_TTL_SECONDS)
+
+
 @app.get("/v1/banking/users/{customer_id}/transactions", response_model=list[BankingTransactionOut])
 def get_banking_transactions(
+  request: Request,
   customer_id: str,
   start: date | None = Query(default=None, description="YYYY-MM-DD"),
   end: date | None = Query(default=None, description="YYYY-MM-DD"),
   limit: int = Query(default=200, ge=1, le=2000),
   _claims: dict = require_auth(settings),
-) -> list[BankingTransactionOut]:
+) -> Response:
+  etag = _etag("banking_transactions", customer_id, start, end, limit)
+  if _not_modified(request, etag):
+    return Response(status_code=304, headers={"ETag": etag})
+  # Scoped per customer: a cached page is only ever served for the same customer_id.
+  key = (customer_id, start, end, limit)
+  body = _banking_tx_cache.get(key)
+  if body is None:
+    body = orjson.dumps(_load_banking_transactions(customer_id, start, end, limit))
+    _banking_tx_cache.put(key, body)
+  return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _load_banking_transactions(
+  customer_id: str,
+  start: date | None,
+  end: date | None,
+  limit: int,
+) -> list[dict[str, Any]]:
   con = get_db()
-  where = ["t.customerID = ?"]
+  # date objects, not isoformat() strings: DuckDB won't compare a VARCHAR parameter to DATE.
+  where = ["customerID = ?"]
   params: list[Any] = [customer_id]
   if start:
-    where.append("t.timestamp >= ?")
-    params.append(start.isoformat())
+    where.append("timestamp >= ?")
+    params.append(start)
   if end:
-    where.append("t.timestamp <= ?")
-    params.append(end.isoformat())
+    where.append("timestamp <= ?")
+    params.append(end)
+  params.append(limit)
 
   q = f"""
     SELECT
-      t.customerID,
-      t.transactionID,
-      t.transactionType,
-      t.ISIN,
-      t.timestamp,
-      t.totalValue,
-      t.units,
+      CAST(t.transactionID AS VARCHAR) AS id,
+      CAST(t.customerID AS VARCHAR) AS user_id,
+      t.timestamp AS posted_at,
+      CASE WHEN t.transactionType = 'Buy' THEN 'debit' ELSE 'credit' END AS direction,
+      -- debit negative, credit positive; rounding is left to Python (see normalized_sql)
+      CASE WHEN t.transactionType = 'Buy' THEN -COALESCE(t.totalValue, 0) ELSE COALESCE(t.totalValue, 0) END
+        AS amount,
+      a.assetName AS merchant_name,
       t.channel,
-      t.marketID,
-      a.assetName AS asset_name
-    FROM transactions t
-    LEFT JOIN (
-      SELECT DISTINCT ON (ISIN) ISIN, assetName
-      FROM assets
-    ) a USING (ISIN)
-    WHERE {" AND ".join(where)}
+      t.category,
+      t.mcc,
+      CAST(t.ISIN AS VARCHAR) AS isin,
+      t.installment_months
+    FROM (
+      -- category/mcc/installment columns were precomputed at load time (see normalized_sql)
+      SELECT
+        customerID, transactionID, transactionType, ISIN, timestamp, totalValue, channel,
+        category, mcc, installment_months
+      FROM transactions
+      WHERE {" AND ".join(where)}
+      ORDER BY timestamp DESC
+      LIMIT ?
+    ) t
+    LEFT JOIN assets_by_isin a USING (ISIN)
     ORDER BY t.timestamp DESC
-    LIMIT {limit}
   """
-  rows = _fetch_dicts(con, q, params)
-  if not rows:
-    return []
-
-  out: list[BankingTransactionOut] = []
-  for row in rows:
-    tx_type = row.get("transactionType")
-    amount_abs = float(row.get("totalValue") or 0)
-    direction = "debit" if tx_type == "Buy" else "credit"
-    signed_amount = -amount_abs if direction == "debit" else amount_abs
-    mapping = map_to_category(str(row.get("transactionID")), row.get("channel"))
-    inst = synthetic_installment(str(row.get("transactionID")), mapping.category, amount_abs)
-
-    out.append(
-      BankingTransactionOut(
-        id=str(row.get("transactionID")),
-        user_id=str(row.get("customerID")),
-        posted_at=row.get("timestamp"),
-        direction=direction,
-        amount=round(signed_amount, 2),
-        merchant_name=row.get("asset_name"),
-        channel=row.get("channel"),
-        category=mapping.category,
-        mcc=mapping.mcc,
-        isin=str(row.get("ISIN")),
-        installment=InstallmentOut(**inst) if inst else None,
-      )
+  # Plain dicts in BankingTransactionOut's shape, serialized straight to JSON. Every column
+  # is derived in SQL; Python only rounds (installment_months is NULL unless an installment).
+  return [
+    {
+      "id": tid,
+      "user_id": cid,
+      "posted_at": ts,
+      "direction": direction,
+      "amount": round(amount, 2),
+      "currency": "EUR",
+      "merchant_name": merchant_name,
+      "channel": channel,
+      "category": category,
+      "mcc": mcc,
+      "isin": isin,
+      "installment": (
+        {"is_installment": True, "months": months, "monthly_amount": round(abs(amount) / months, 2)}
+        if months
+        else None
+      ),
+    }
+    for tid, cid, ts, direction, amount, merchant_name, channel, category, mcc, isin, months in (
+      con.execute(q, params).fetchall()
     )
-  return out
+  ]
 
 
 class BankingSummaryOut(BaseModel):
@@ -532,16 +802,51 @@ def banking_summary(
   customer_id: str,
   window_days: int = Query(default=90, ge=7, le=365),
   _claims: dict = require_auth(settings),
-) -> BankingSummaryOut:
-  # Reuse normalized transactions to compute category and installment features.
-  txs = get_banking_transactions(customer_id=customer_id, limit=2000, start=None, end=None, _claims=_claims)
-  # Filter window in python (timestamps are date objects)
-  from datetime import timedelta
-  as_of = max((t.posted_at for t in txs), default=date.today())
-  cutoff = as_of - timedelta(days=window_days)
-  txs = [t for t in txs if t.posted_at >= cutoff]
-  if not txs:
-    return BankingSummaryOut(
+) -> Response:
+  con = get_db()
+  # Same rows the banking transactions endpoint would return (latest 2000), aggregated inside
+  # DuckDB instead of building 2000 models and looping over them in Python.
+  q = """
+    WITH recent AS MATERIALIZED (
+      SELECT timestamp, totalValue, transactionType, category, is_installment
+      FROM transactions
+      WHERE customerID = ?
+      ORDER BY timestamp DESC
+      LIMIT 2000
+    ),
+    windowed AS (
+      SELECT
+        category,
+        is_installment,
+        transactionType = 'Buy' AS is_debit,
+        -- per-row rounding as the Python endpoint does it: fmt's '{:.2f}' rounds the exact
+        -- binary value like Python's round(x, 2); DuckDB's round() does not on half-cents
+        CAST(format('{:.2f}', COALESCE(totalValue, 0)::DOUBLE) AS DOUBLE) AS amount
+      FROM recent
+      WHERE timestamp >= (SELECT max(timestamp) FROM recent) - ?::INTEGER
+    )
+    -- grand total (is_total = 1) plus per-category rows in one aggregation pass; only
+    -- categories with debit rows are kept, the top six by spend are taken in Python
+    SELECT
+      GROUPING(category) AS is_total,
+      category,
+      count(*) AS tx_count,
+      COALESCE(sum(amount) FILTER (WHERE is_debit), 0) AS spend_total,
+      COALESCE(sum(amount) FILTER (WHERE NOT is_debit), 0) AS income_total,
+      COALESCE(sum(amount) FILTER (WHERE is_debit AND is_installment), 0) AS installment_debit
+    FROM windowed
+    GROUP BY GROUPING SETS ((), (category))
+    HAVING GROUPING(category) = 1 OR bool_or(is_debit)
+    ORDER BY is_total DESC, spend_total DESC
+  """
+  rows = con.execute(q, [customer_id, window_days]).fetchall()
+  _, _, tx_count, spend_total, income_total, installment_debit = rows[0]
+  top_categories = [
+    {"category": category, "total": round(float(spend), 2)} for _, category, _, spend, _, _ in rows[1:7]
+  ]
+
+  if not tx_count:
+    return _model_response(BankingSummaryOut.model_construct(
       user_id=customer_id,
       window_days=window_days,
       spend_total=0.0,
@@ -549,34 +854,21 @@ def banking_summary(
       tx_count=0,
       installment_ratio=0.0,
       top_categories=[],
-    )
-
-  debit = [t for t in txs if t.direction == "debit"]
-  credit = [t for t in txs if t.direction == "credit"]
-  spend_total = round(sum(abs(t.amount) for t in debit), 2)
-  income_total = round(sum(t.amount for t in credit), 2)
+    ))
 
-  installment_debit = 0.0
-  for t in debit:
-    if t.installment and t.installment.is_installment:
-      installment_debit += abs(t.amount)
+  spend_total = round(float(spend_total), 2)
+  income_total = round(float(income_total), 2)
   installment_ratio = round((installment_debit / spend_total) if spend_total > 0 else 0.0, 4)
 
-  cat_totals: dict[str, float] = {}
-  for t in debit:
-    cat_totals[t.category] = cat_totals.get(t.category, 0.0) + abs(t.amount)
-  top_categories = [
-    {"category": k, "total": round(v, 2)} for k, v in sorted(cat_totals.items(), key=lambda x: x[1], reverse=True)[:6]
-  ]
-
-  return BankingSummaryOut(
+  # Locally computed, already-typed values; see user_summary.
+  return _model_response(BankingSummaryOut.model_construct(
     user_id=customer_id,
     window_days=window_days,
     spend_total=spend_total,
     income_total=income_total,
-    tx_count=len(txs),
+    tx_count=int(tx_count),
     installment_ratio=installment_ratio,
     top_categories=top_categories,
-  )
+  ))
 
 
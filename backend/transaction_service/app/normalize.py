@@ -52,31 +52,35 @@ def map_to_category(transaction_id: str, channel: str | None = None) -> Category
   return _MAPPINGS[idx]
 
 
+_INSTALLMENT_LIKELIHOOD: dict[str, float] = {
+  "Shopping": 0.35,
+  "Travel": 0.25,
+  "Rent": 0.15,
+  "Utilities": 0.1,
+  "Other": 0.08,
+  "Investment": 0.05,
+  "Groceries": 0.05,
+  "Insurance": 0.12,
+  "Credit": 0.1,
+  "Transfers": 0.03,
+}
+
+_INSTALLMENT_MONTHS: list[int] = [3, 6, 12]
+
+
 def synthetic_installment(transaction_id: str, category: Category, amount_abs: float) -> dict[str, Any] | None:
   """
   FAR-Trans has no installment data. We synthesize a stable mock installment flag + terms.
   - More likely for Shopping/Rent/Travel (demo).
   """
-  likelihood = {
-    "Shopping": 0.35,
-    "Travel": 0.25,
-    "Rent": 0.15,
-    "Utilities": 0.1,
-    "Other": 0.08,
-    "Investment": 0.05,
-    "Groceries": 0.05,
-    "Insurance": 0.12,
-    "Credit": 0.1,
-    "Transfers": 0.03,
-  }.get(category, 0.05)
+  likelihood = _INSTALLMENT_LIKELIHOOD.get(category, 0.05)
 
   h = hashlib.sha256(transaction_id.encode("utf-8")).digest()
   p = int.from_bytes(h[:2], "big") / 65535.0
   if p > likelihood or amount_abs < 100:
     return None
 
-  months_options = [3, 6, 12]
-  months = months_options[_stable_idx(transaction_id + "|months", len(months_options))]
+  months = _INSTALLMENT_MONTHS[_stable_idx(transaction_id + "|months", len(_INSTALLMENT_MONTHS))]
   monthly = round(amount_abs / months, 2)
   return {
     "is_installment": True,
@@ -85,3 +89,75 @@ def synthetic_installment(transaction_id: str, category: Category, amount_abs: f
   }
 
 
+# --------------------
+# DuckDB mirror
+# --------------------
+# The same deterministic mapping expressed in SQL, so queries can normalize (and aggregate)
+# inside DuckDB instead of calling the functions above once per row in Python.
+# Must stay in sync with _stable_idx / map_to_category / synthetic_installment.
+
+
+def _sql_list(values: list[Any]) -> str:
+  return "[" + ", ".join(f"'{v}'" if isinstance(v, str) else repr(v) for v in values) + "]"
+
+
+def _sql_stable_idx(seed_sql: str, mod: int) -> str:
+  # First 4 bytes of the SHA-256 digest, big-endian -> 8 hex chars.
+  return f"(((('0x' || left(sha256({seed_sql}), 8))::UBIGINT % {mod}) + 1)::BIGINT)"
+
+
+def normalized_sql(source: str) -> str:
+  """
+  SELECT over `source` (any relation with transactionID, channel and totalValue columns)
+  that keeps every source column and adds: category, mcc, is_installment and
+  installment_months (NULL when not an installment). The monthly amount is left to Python:
+  DuckDB's round() does not match Python's round() on every half-cent.
+  """
+  categories = _sql_list([m.category for m in _MAPPINGS])
+  mccs = _sql_list([m.mcc for m in _MAPPINGS])
+  likelihoods = _sql_list([float(_INSTALLMENT_LIKELIHOOD.get(m.category, 0.05)) for m in _MAPPINGS])
+  months = _sql_list(_INSTALLMENT_MONTHS)
+  tx_id = "CAST(src.transactionID AS VARCHAR)"
+  return f"""
+    SELECT
+      n.* EXCLUDE (_idx, _p, _amount_abs),
+      {categories}[n._idx] AS category,
+      {mccs}[n._idx] AS mcc,
+      (n._p <= ({likelihoods}::DOUBLE[])[n._idx] AND n._amount_abs >= 100) AS is_installment,
+      CASE WHEN (n._p <= ({likelihoods}::DOUBLE[])[n._idx] AND n._amount_abs >= 100)
+        THEN {months}[{_sql_stable_idx(f"CAST(n.transactionID AS VARCHAR) || '|months'", len(_INSTALLMENT_MONTHS))}]
+      END AS installment_months
+    FROM (
+      SELECT
+        src.*,
+        {_sql_stable_idx(f"{tx_id} || '|' || COALESCE(src.channel, '')", len(_MAPPINGS))} AS _idx,
+        ('0x' || left(sha256({tx_id}), 4))::UBIGINT / 65535.0 AS _p,
+        COALESCE(src.totalValue, 0)::DOUBLE AS _amount_abs
+      FROM {source} src
+    ) n
+  """
+
+
+NORMALIZED_COLUMNS: tuple[str, ...] = ("category", "mcc", "is_installment", "installment_months")
+
+
+def normalized_mismatch(con: Any, table: str, sample_rows: int = 2000) -> str | None:
+  """
+  Parity check for the SQL mirror: compares a sample of the normalized columns stored in
+  `table` with map_to_category / synthetic_installment. Returns the first disagreeing row
+  (as text), or None. Catches both a mirror that drifted from the functions above and a
+  table written by an older version of this module.
+  """
+  rows = con.execute(
+    f"""
+    SELECT transactionID, channel, totalValue, {", ".join(NORMALIZED_COLUMNS)}
+    FROM {table} USING SAMPLE reservoir({int(sample_rows)} ROWS) REPEATABLE (42)
+    """
+  ).fetchall()
+  for tid, channel, total_value, *stored in rows:
+    mapping = map_to_category(str(tid), channel)
+    inst = synthetic_installment(str(tid), mapping.category, float(total_value or 0))
+    expected = [mapping.category, mapping.mcc, inst is not None, inst["months"] if inst else None]
+    if stored != expected:
+      return f"transactionID={tid}: stored {stored}, expected {expected}"
+  return None